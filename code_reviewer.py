@@ -5,9 +5,127 @@ This module provides the main functionality for transforming harsh code review
 comments into empathetic, constructive feedback using Azure OpenAI.
 """
 
+import hashlib
+import io
 import os
-import requests
-from typing import Dict, List, Any
+import re
+import threading
+import time
+import weakref
+import orjson
+from typing import TYPE_CHECKING, Callable, Dict, Iterator, List, Any, Optional, Tuple, TypeVar
+
+# HTTP, async, cache and numeric dependencies are imported where they are
+# first used, so mock runs and `--help` don't pay for them at startup
+if TYPE_CHECKING:
+    import asyncio
+
+    import aiohttp
+    import diskcache
+    import numpy as np
+    import requests
+
+    from keyword_matcher import KeywordClassifier
+    from semantic_cache import SemanticCache
+
+# HTTP status codes worth retrying with exponential backoff
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# Completion token budgets; requests are sized by the sections they produce
+SECTION_MAX_TOKENS = 400
+SUMMARY_MAX_TOKENS = 200
+
+# The free-form markdown stream is wordier than JSON, so it never gets less than
+# the original fixed budget
+STREAM_MIN_MAX_TOKENS = 3000
+
+# Result of the parser a response is validated with before it is cached
+T = TypeVar("T")
+
+
+class _TruncatedResponseError(ValueError):
+    """Raised when a completion stopped at its max_tokens budget."""
+
+
+class _RateLimiter:
+    """
+    Token-bucket throttle for Azure OpenAI requests-per-minute and
+    tokens-per-minute quotas. Both buckets refill continuously.
+    """
+
+    def __init__(self, max_requests_per_minute: float, max_tokens_per_minute: float):
+        self.max_requests_per_minute = max_requests_per_minute
+        self.max_tokens_per_minute = max_tokens_per_minute
+        self.available_requests = float(max_requests_per_minute)
+        self.available_tokens = float(max_tokens_per_minute)
+        self.last_update = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        elapsed = now - self.last_update
+        self.last_update = now
+        self.available_requests = min(
+            self.max_requests_per_minute,
+            self.available_requests + self.max_requests_per_minute * elapsed / 60.0,
+        )
+        self.available_tokens = min(
+            self.max_tokens_per_minute,
+            self.available_tokens + self.max_tokens_per_minute * elapsed / 60.0,
+        )
+
+    async def acquire(self, tokens: int) -> None:
+        """Wait until one request and `tokens` tokens are available, then consume them."""
+        import asyncio
+
+        tokens = min(tokens, self.max_tokens_per_minute)
+        while True:
+            self._refill()
+            if self.available_requests >= 1 and self.available_tokens >= tokens:
+                self.available_requests -= 1
+                self.available_tokens -= tokens
+                return
+            wait_seconds = max(
+                (1 - self.available_requests) * 60.0 / self.max_requests_per_minute,
+                (tokens - self.available_tokens) * 60.0 / self.max_tokens_per_minute,
+            )
+            await asyncio.sleep(max(wait_seconds, 0.01))
+
+
+class _EventLoopThread:
+    """
+    An event loop running in a daemon thread, together with the aiohttp
+    session of the requests run on it. Coroutines can be submitted from any
+    thread, including one that is already running its own event loop.
+    """
+
+    def __init__(self):
+        import asyncio
+
+        self.loop = asyncio.new_event_loop()
+        self.session: Optional["aiohttp.ClientSession"] = None
+        threading.Thread(target=self.loop.run_forever, daemon=True).start()
+
+    def run(self, coro: Any) -> Any:
+        """Run `coro` on the loop and block until it finishes."""
+        import asyncio
+
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result()
+
+    def get_session(self) -> "aiohttp.ClientSession":
+        """Get the shared aiohttp session, creating it on first use (call from the loop only)."""
+        if self.session is None:
+            import aiohttp
+            self.session = aiohttp.ClientSession()
+        return self.session
+
+    def close(self) -> None:
+        """Close the session and stop the loop."""
+        if not self.loop.is_running():
+            return
+        if self.session is not None:
+            self.run(self.session.close())
+            self.session = None
+        self.loop.call_soon_threadsafe(self.loop.stop)
 
 
 class EmpatheticCodeReviewer:
@@ -15,14 +133,175 @@ class EmpatheticCodeReviewer:
     A class that transforms harsh code review comments into empathetic, 
     constructive feedback using Azure OpenAI.
     """
+
+    # Language detection patterns, compiled once and checked in order
+    _LANG_PATTERNS = [
+        (re.compile(r"\bdef\s+\w+\s*\([^)]*\)[^:\n]*:"), "Python"),
+        (re.compile(r"\bfunction\b[^{]*\{"), "JavaScript"),
+        (re.compile(r"\bpublic\s+class\b|\bprivate\s"), "Java"),
+        (re.compile(r"#include\b|\bint\s+main\b"), "C++"),
+        (re.compile(r"\bfunc\s[^{]*\{"), "Go"),
+    ]
+
+    # Severity keywords and their inflected forms, matched against the whole words of a
+    # comment (so "badly" counts as harsh but "badge" doesn't)
+    _WORD_PATTERN = re.compile(r"[a-z]+")
+    _HARSH_WORDS = frozenset({
+        "bad", "badly", "badness",
+        "terrible", "terribly",
+        "wrong", "wrongly", "wrongs", "wrongness",
+        "stupid", "stupidly", "stupidity",
+        "awful", "awfully",
+        "horrible", "horribly",
+        "useless", "uselessly", "uselessness",
+    })
+    _CRITICAL_WORDS = frozenset({
+        "inefficient", "inefficiently", "inefficiency", "inefficiencies",
+        "redundant", "redundantly", "redundancy", "redundancies",
+        "unnecessary", "unnecessarily",
+        "poor", "poorly", "poorer", "poorest",
+        "weak", "weakly", "weaker", "weakest", "weakness", "weaknesses",
+    })
+
+    # JIT-compiled byte scanner for the same keywords, built on first use when enabled
+    _SEVERITY_LEVELS = ("mild", "critical", "harsh")
+    _severity_classifier: Optional["KeywordClassifier"] = None
+
+    # Static prompt blocks, joined with the per-request parts when building messages
+    _SYSTEM_PROMPT = """You are an empathetic senior software developer and mentor with years of experience. 
+        Your role is to transform harsh, direct code review comments into constructive, educational, 
+        and encouraging feedback. You understand that learning happens best in a supportive environment.
+
+        Key principles:
+        - Always start with something positive
+        - Explain the 'why' behind suggestions with clear reasoning
+        - Provide concrete, actionable improvements
+        - Use encouraging, supportive language
+        - Reference best practices and documentation when relevant
+        - Tailor your tone to the severity of the original comment
+        - End with motivational, growth-oriented language"""
+
+    _TONE_GUIDELINES = """
+**Tone Requirements:**
+1. Adjust your tone based on the severity of each original comment
+2. For harsh comments, be extra gentle and encouraging
+3. For critical comments, be supportive but educational
+4. For mild comments, be friendly and collaborative
+"""
+
+    _SUMMARY_GUIDELINES = """
+Write an overall summary that acknowledges the developer's effort, summarizes the key
+improvements and encourages continued learning in a positive, motivational tone.
+"""
+
+    _SECTION_FIELDS_HEADER = """
+**Section Fields:**
+- "positive": Rewrite the comment in an encouraging, supportive way that acknowledges effort while suggesting improvement
+- "why": Explain the underlying software engineering principle, performance concern, or best practice. Include specific technical reasoning
+- "code": Concrete """
+
+    _SECTION_FIELDS_FOOTER = """ code showing the recommended fix, as plain code without markdown fences
+- "resources": If applicable, relevant documentation, style guides, or resources (e.g., PEP 8 for Python, MDN for JavaScript); otherwise an empty string
+"""
+
+    _BATCH_OUTPUT_FORMAT = """
+**Output Format:**
+Respond with a JSON object of the form:
+{"sections": [{"index": <comment number>, "positive": "...", "why": "...", "code": "...", "resources": "..."}], "summary": "..."}
+"""
+
+    _SECTION_OUTPUT_FORMAT = """
+**Output Format:**
+Respond with a JSON object of the form:
+{"positive": "...", "why": "...", "code": "...", "resources": "..."}
+"""
+
+    _SUMMARY_INSTRUCTIONS = """
+The review comments above are being addressed individually.
+""" + _SUMMARY_GUIDELINES + """
+**Output Format:**
+Respond with a JSON object of the form:
+{"summary": "..."}
+"""
+
+    _MARKDOWN_STRUCTURE_HEADER = """
+**Section Structure (markdown):**
+
+* **Positive Rephrasing:** [Rewrite the comment in an encouraging, supportive way that acknowledges effort while suggesting improvement]
+
+* **The 'Why':** [Explain the underlying software engineering principle, performance concern, or best practice. Include specific technical reasoning]
+
+* **Suggested Improvement:**
+```"""
+
+    _MARKDOWN_STRUCTURE_FOOTER = """
+[Provide concrete code example showing the recommended fix]
+```
+
+* **Learn More:** [If applicable, mention relevant documentation, style guides, or resources (e.g., PEP 8 for Python, MDN for JavaScript)]
+"""
+
+    _STREAM_HEADING_INSTRUCTIONS = """Start every section with `---` followed by the heading: ### Analysis of Comment: "[original comment]"
+"""
+
+    _STREAM_HEADER = """
+Please transform each of the review comments above into an empathetic, educational section.
+""" + _STREAM_HEADING_INSTRUCTIONS
+
+    _STREAM_FOOTER = """
+Finish with a "**Overall Summary**" section and respond with well-formatted markdown only.
+"""
+
+    _STREAM_SUMMARY_INSTRUCTIONS = """
+The review comments above are being addressed individually.
+""" + _SUMMARY_GUIDELINES + """
+Respond with only a `---` line followed by a "**Overall Summary**" section, in well-formatted markdown.
+"""
+
+    # Section headings of a streamed markdown review
+    _STREAM_HEADING_PATTERN = re.compile(r'^### Analysis of Comment: "(.*)"[ \t]*$', re.MULTILINE)
+    _STREAM_SECTION_END_PATTERN = re.compile(r"^(?:---|\*\*Overall Summary\*\*)[ \t]*$", re.MULTILINE)
     
-    def __init__(self, use_mock: bool = False):
+    def __init__(
+        self,
+        use_mock: bool = False,
+        parallel: bool = True,
+        max_concurrent_requests: int = 10,
+        max_requests_per_minute: float = 300,
+        max_tokens_per_minute: float = 60000,
+        max_retries: int = 3,
+        use_semantic_cache: bool = False,
+        warmup_semantic_cache: bool = True,
+        response_cache_dir: Optional[str] = ".llm_cache",
+        jit_severity: bool = False,
+    ):
         """Initialize the reviewer with Azure OpenAI configuration.
 
         Args:
             use_mock: If True, bypass Azure API and return a deterministic mock report
+            parallel: If True, send one request per comment concurrently; otherwise
+                batch all comments into a single request
+            max_concurrent_requests: Maximum number of in-flight requests in parallel mode
+            max_requests_per_minute: Request quota used to throttle parallel mode
+            max_tokens_per_minute: Token quota used to throttle parallel mode
+            max_retries: Retries for rate-limited (429) or server (5xx) errors
+            use_semantic_cache: If True, reuse sections generated for near-duplicate
+                comments on the same code snippet instead of calling the API again
+            warmup_semantic_cache: If True, load the embedding model and embed the
+                bundled examples in a background thread at startup
+            response_cache_dir: Directory of the on-disk cache of exact request
+                matches; None disables it
+            jit_severity: If True and numba is installed, assess comment severity with
+                the JIT-compiled keyword scanner; compiling it costs about half a second
+                per process, so it only pays off for very large batches
         """
         self.use_mock = bool(use_mock or os.getenv("USE_MOCK", "").lower() in {"1", "true", "yes"})
+        self.parallel = parallel
+        self.max_concurrent_requests = max_concurrent_requests
+        self.max_requests_per_minute = max_requests_per_minute
+        self.max_tokens_per_minute = max_tokens_per_minute
+        self.max_retries = max_retries
+        self.jit_severity = jit_severity
 
         # Store Azure OpenAI configuration (only required when not mocking)
         self.api_key = os.getenv("AZURE_OPENAI_API_KEY")
@@ -42,6 +321,35 @@ class EmpatheticCodeReviewer:
                 raise ValueError(
                     f"Missing required environment variables: {', '.join(missing_vars)}"
                 )
+
+        use_semantic_cache = use_semantic_cache or os.getenv("USE_SEMANTIC_CACHE", "").lower() in {"1", "true", "yes"}
+        self.semantic_cache: Optional["SemanticCache"] = None
+        if use_semantic_cache:
+            from semantic_cache import SemanticCache
+            self.semantic_cache = SemanticCache()
+            if warmup_semantic_cache and not self.use_mock:
+                # Load the embedding model and embed the bundled examples in the
+                # background, so the first real request doesn't pay for it
+                threading.Thread(target=self._warmup_from_dir, args=("examples",), daemon=True).start()
+
+        # Exact-match response cache, keyed by a hash of the full request body
+        self._disk_cache: Optional["diskcache.Cache"] = None
+        if response_cache_dir and not self.use_mock:
+            import diskcache
+            self._disk_cache = diskcache.Cache(response_cache_dir)
+
+        # Persistent HTTP session so batched and repeated calls reuse TCP/TLS connections
+        self._session: Optional["requests.Session"] = None
+        if not self.use_mock:
+            self._session = self._create_session()
+
+        # Parallel mode runs on a background event loop owned by the reviewer, so its
+        # aiohttp session (and connection pool) and rate limiter live across reviews
+        # and the sync API also works when the caller already runs an event loop
+        self._loop_thread: Optional[_EventLoopThread] = None
+        self._loop_lock = threading.Lock()
+        self._limiter: Optional[_RateLimiter] = None
+        self._semaphore: Optional["asyncio.Semaphore"] = None
     
     def generate_empathetic_review(self, input_data: Dict[str, Any]) -> str:
         """
@@ -53,6 +361,85 @@ class EmpatheticCodeReviewer:
         Returns:
             Markdown formatted empathetic review report
         """
+        code_snippet, review_comments, language, severity_levels = self._prepare_review(input_data)
+        
+        if self.use_mock:
+            return self._create_mock_report(code_snippet, review_comments, language, severity_levels)
+
+        # Reuse sections cached for near-duplicate comments on the same code snippet
+        snippet_key = self._snippet_key(code_snippet)
+        sections, embeddings = self._lookup_semantic_cache(snippet_key, review_comments)
+        pending = [i for i in range(1, len(review_comments) + 1) if i not in sections]
+
+        try:
+            if self.parallel:
+                # One request per comment, fired concurrently
+                new_sections, summary = self._run_async(
+                    self._generate_parallel(code_snippet, review_comments, language, severity_levels, pending)
+                )
+            else:
+                # All comments share one request so the system prompt and code
+                # snippet are only sent (and billed) once
+                new_sections, summary = self._generate_batched(
+                    code_snippet, review_comments, language, severity_levels, pending
+                )
+        except Exception as e:
+            raise RuntimeError(f"Failed to generate review: {str(e)}")
+
+        self._store_semantic_cache(snippet_key, embeddings, new_sections)
+        sections.update(new_sections)
+        return self._render_report(review_comments, sections, summary).strip()
+
+    def generate_empathetic_review_stream(self, input_data: Dict[str, Any]) -> Iterator[str]:
+        """
+        Generate an empathetic code review report, yielding markdown as it is produced.
+
+        Leading comments whose sections are in the semantic cache are yielded
+        right away; everything from the first cache miss on is streamed, so the
+        report keeps the order of the comments.
+        
+        Args:
+            input_data: Dictionary containing 'code_snippet' and 'review_comments'
+            
+        Yields:
+            Chunks of the markdown formatted empathetic review report
+        """
+        code_snippet, review_comments, language, severity_levels = self._prepare_review(input_data)
+
+        if self.use_mock:
+            yield self._create_mock_report(code_snippet, review_comments, language, severity_levels)
+            return
+
+        snippet_key = self._snippet_key(code_snippet)
+        cached_sections, embeddings = self._lookup_semantic_cache(snippet_key, review_comments)
+        first_pending = 1
+        while first_pending in cached_sections:
+            first_pending += 1
+        pending = list(range(first_pending, len(review_comments) + 1))
+
+        for i in range(1, first_pending):
+            section = cached_sections[i]
+            yield f"---\n### Analysis of Comment: \"{review_comments[i - 1]}\"\n\n{section}\n\n"
+
+        prompts = [self._create_context_prompt(code_snippet, language)]
+        prompts.extend(self._create_comment_prompts(review_comments, severity_levels))
+        prompts.append(self._create_stream_instructions(language, pending, len(review_comments)))
+
+        def store_sections(content: str) -> None:
+            uncached = [i for i in pending if i not in cached_sections]
+            new_sections = self._parse_stream_sections(content, review_comments, uncached)
+            self._store_semantic_cache(snippet_key, embeddings, new_sections)
+
+        try:
+            max_tokens = max(
+                STREAM_MIN_MAX_TOKENS, 2 * self._section_max_tokens(code_snippet) * len(pending) + SUMMARY_MAX_TOKENS
+            )
+            yield from self._call_azure_openai_stream(prompts, max_tokens, on_complete=store_sections)
+        except Exception as e:
+            raise RuntimeError(f"Failed to generate review: {str(e)}")
+
+    def _prepare_review(self, input_data: Dict[str, Any]) -> Tuple[str, List[str], str, List[str]]:
+        """Validate the input and derive the language and per-comment severity levels."""
         code_snippet = input_data.get("code_snippet", "")
         review_comments = input_data.get("review_comments", [])
         
@@ -67,118 +454,220 @@ class EmpatheticCodeReviewer:
         
         # Assess severity of comments
         severity_levels = [self._assess_comment_severity(comment) for comment in review_comments]
-        
-        # Generate the empathetic review
-        prompt = self._create_detailed_prompt(code_snippet, review_comments, language, severity_levels)
 
-        if self.use_mock:
-            return self._create_mock_report(code_snippet, review_comments, language, severity_levels)
+        return code_snippet, review_comments, language, severity_levels
 
-        try:
-            response = self._call_azure_openai(prompt)
-            return response.strip()
-        except Exception as e:
-            raise RuntimeError(f"Failed to generate review: {str(e)}")
-    
-    def _get_system_prompt(self) -> str:
-        """Get the system prompt for the AI."""
-        return """You are an empathetic senior software developer and mentor with years of experience. 
-        Your role is to transform harsh, direct code review comments into constructive, educational, 
-        and encouraging feedback. You understand that learning happens best in a supportive environment.
+    def _lookup_semantic_cache(
+        self, snippet_key: str, review_comments: List[str]
+    ) -> Tuple[Dict[int, str], Optional["np.ndarray"]]:
+        """Get the cached sections (keyed by 1-based index) and the embeddings of the comments."""
+        sections: Dict[int, str] = {}
+        if self.semantic_cache is None:
+            return sections, None
+        embeddings = self.semantic_cache.encode(review_comments)
+        for i, embedding in enumerate(embeddings, start=1):
+            cached = self.semantic_cache.get(snippet_key, embedding)
+            if cached is not None:
+                sections[i] = cached
+        return sections, embeddings
 
-        Key principles:
-        - Always start with something positive
-        - Explain the 'why' behind suggestions with clear reasoning
-        - Provide concrete, actionable improvements
-        - Use encouraging, supportive language
-        - Reference best practices and documentation when relevant
-        - Tailor your tone to the severity of the original comment
-        - End with motivational, growth-oriented language"""
+    def _store_semantic_cache(
+        self, snippet_key: str, embeddings: Optional["np.ndarray"], sections: Dict[int, str]
+    ) -> None:
+        """Add newly generated sections (keyed by 1-based index) to the semantic cache."""
+        if self.semantic_cache is not None:
+            for i, section in sections.items():
+                self.semantic_cache.add(snippet_key, embeddings[i - 1], section)
+
+    def _snippet_key(self, code_snippet: str) -> str:
+        """Get the exact semantic cache key of a code snippet; only comments are embedded."""
+        return hashlib.sha256(code_snippet.encode("utf-8")).hexdigest()
+
+    def _warmup_from_dir(self, example_dir: str) -> None:
+        """Precompute semantic cache embeddings for every example in example_dir."""
+        texts: List[str] = []
+        if os.path.isdir(example_dir):
+            with os.scandir(example_dir) as it:
+                for entry in it:
+                    if not entry.name.endswith(".json"):
+                        continue
+                    try:
+                        with open(entry.path, "rb") as f:
+                            data = orjson.loads(f.read())
+                        texts.extend(str(c) for c in data.get("review_comments", []))
+                    except (OSError, ValueError, AttributeError, TypeError):
+                        # Unreadable examples are simply not prewarmed
+                        continue
+        self.semantic_cache.warmup(texts)
     
     def _detect_language(self, code_snippet: str) -> str:
         """Detect the programming language from the code snippet."""
         # Simple language detection based on common patterns
-        if 'def ' in code_snippet and ':' in code_snippet:
-            return 'Python'
-        elif 'function' in code_snippet and '{' in code_snippet:
-            return 'JavaScript'
-        elif 'public class' in code_snippet or 'private ' in code_snippet:
-            return 'Java'
-        elif '#include' in code_snippet or 'int main' in code_snippet:
-            return 'C++'
-        elif 'func ' in code_snippet and '{' in code_snippet:
-            return 'Go'
-        else:
-            return 'Unknown'
+        for pattern, language in self._LANG_PATTERNS:
+            if pattern.search(code_snippet):
+                return language
+        return 'Unknown'
     
     def _assess_comment_severity(self, comment: str) -> str:
         """Assess the severity/harshness of a review comment."""
-        harsh_words = ['bad', 'terrible', 'wrong', 'stupid', 'awful', 'horrible', 'useless']
-        critical_words = ['inefficient', 'redundant', 'unnecessary', 'poor', 'weak']
-        
-        comment_lower = comment.lower()
+        classifier = self._get_severity_classifier() if self.jit_severity else None
+        if classifier is not None:
+            return self._SEVERITY_LEVELS[classifier.classify(comment)]
+
+        words = set(self._WORD_PATTERN.findall(comment.lower()))
         
-        if any(word in comment_lower for word in harsh_words):
+        if words & self._HARSH_WORDS:
             return 'harsh'
-        elif any(word in comment_lower for word in critical_words):
+        elif words & self._CRITICAL_WORDS:
             return 'critical'
         else:
             return 'mild'
     
-    def _create_detailed_prompt(self, code_snippet: str, review_comments: List[str], 
-                              language: str, severity_levels: List[str]) -> str:
-        """Create a detailed prompt for the AI."""
-        
-        # Create comment analysis
-        comment_analysis = []
-        for i, (comment, severity) in enumerate(zip(review_comments, severity_levels)):
-            comment_analysis.append(f"{i+1}. \"{comment}\" (Severity: {severity})")
-        
-        prompt = f"""
-Please transform the following code review into an empathetic, educational report.
+    @classmethod
+    def _get_severity_classifier(cls) -> Optional["KeywordClassifier"]:
+        """Build the numba-backed severity classifier once, or return None without numba."""
+        if cls._severity_classifier is None:
+            import keyword_matcher
+            if not keyword_matcher.NUMBA_AVAILABLE:
+                return None
+            cls._severity_classifier = keyword_matcher.KeywordClassifier([cls._CRITICAL_WORDS, cls._HARSH_WORDS])
+        return cls._severity_classifier
 
-**Code Snippet ({language}):**
-```{language.lower()}
-{code_snippet}
-```
+    def _create_context_prompt(self, code_snippet: str, language: str) -> str:
+        """Create the shared code-snippet message sent once per request."""
+        return "".join([
+            "**Code Snippet (", language, "):**\n```", language.lower(), "\n",
+            code_snippet, "\n```",
+        ])
 
-**Original Review Comments:**
-{chr(10).join(comment_analysis)}
+    def _create_comment_prompt(self, index: int, comment: str, severity: str) -> str:
+        """Create the compact per-comment message."""
+        return "".join(["**Comment ", str(index), "** (Severity: ", severity, "): \"", comment, "\""])
 
-**Instructions:**
-For each original comment, create a markdown section with the following structure:
+    def _create_comment_prompts(self, review_comments: List[str], severity_levels: List[str]) -> List[str]:
+        """Create the per-comment messages for all comments, numbered from 1."""
+        return [
+            self._create_comment_prompt(i, comment, severity)
+            for i, (comment, severity) in enumerate(zip(review_comments, severity_levels), start=1)
+        ]
 
----
-### Analysis of Comment: "[original comment]"
+    def _create_section_fields(self, language: str) -> str:
+        """Create the description of the JSON fields of one review section."""
+        return "".join([self._SECTION_FIELDS_HEADER, language, self._SECTION_FIELDS_FOOTER, self._TONE_GUIDELINES])
 
-* **Positive Rephrasing:** [Rewrite the comment in an encouraging, supportive way that acknowledges effort while suggesting improvement]
+    def _create_batch_instructions(self, language: str, indices: List[int]) -> str:
+        """Create the closing instruction message for a batched review request."""
+        numbers = ", ".join(str(i) for i in indices)
+        return "".join([
+            "\nPlease transform review comments ", numbers, " above into empathetic, educational sections.\n",
+            self._create_section_fields(language),
+            self._SUMMARY_GUIDELINES,
+            self._BATCH_OUTPUT_FORMAT,
+            "Include exactly one entry in \"sections\" for each of the comment numbers ", numbers, ".\n",
+        ])
 
-* **The 'Why':** [Explain the underlying software engineering principle, performance concern, or best practice. Include specific technical reasoning]
+    def _create_section_instructions(self, language: str) -> str:
+        """Create the closing instruction message for a single-comment request."""
+        return "".join([
+            "\nPlease transform the review comment above into an empathetic, educational section.\n",
+            self._create_section_fields(language),
+            self._SECTION_OUTPUT_FORMAT,
+        ])
 
-* **Suggested Improvement:**
-```{language.lower()}
-[Provide concrete code example showing the recommended fix]
-```
+    def _create_summary_instructions(self) -> str:
+        """Create the closing instruction message for the summary request."""
+        return self._SUMMARY_INSTRUCTIONS
 
-* **Learn More:** [If applicable, mention relevant documentation, style guides, or resources (e.g., PEP 8 for Python, MDN for JavaScript)]
+    def _create_stream_instructions(self, language: str, indices: List[int], total: int) -> str:
+        """Create the closing instruction message for a streamed markdown review of the given comments."""
+        if not indices:
+            return self._STREAM_SUMMARY_INSTRUCTIONS
+        if len(indices) == total:
+            header = self._STREAM_HEADER
+        else:
+            numbers = ", ".join(str(i) for i in indices)
+            header = "".join([
+                "\nPlease transform review comments ", numbers,
+                " above into empathetic, educational sections; the other comments are already addressed.\n",
+                self._STREAM_HEADING_INSTRUCTIONS,
+            ])
+        return "".join([
+            header,
+            self._MARKDOWN_STRUCTURE_HEADER, language.lower(), self._MARKDOWN_STRUCTURE_FOOTER,
+            self._TONE_GUIDELINES,
+            self._SUMMARY_GUIDELINES,
+            self._STREAM_FOOTER,
+        ])
 
----
+    def _parse_batch_response(self, content: str, language: str) -> Tuple[Dict[int, str], str]:
+        """Parse a batched JSON response into rendered sections keyed by comment index and the summary."""
+        try:
+            payload = orjson.loads(content)
+            sections = {int(s["index"]): self._render_section(s, language) for s in payload["sections"]}
+            summary = str(payload.get("summary", "")).strip()
+        except (ValueError, KeyError, TypeError, AttributeError):
+            raise ValueError("Azure OpenAI response was not in the expected JSON format")
+        return sections, summary
 
-**Additional Requirements:**
-1. Adjust your tone based on the severity of each original comment
-2. For harsh comments, be extra gentle and encouraging
-3. For critical comments, be supportive but educational
-4. For mild comments, be friendly and collaborative
+    def _parse_section_response(self, content: str, language: str) -> str:
+        """Parse a single-comment JSON response into a rendered section."""
+        try:
+            return self._render_section(orjson.loads(content), language)
+        except (ValueError, TypeError, AttributeError):
+            raise ValueError("Azure OpenAI response was not in the expected JSON format")
 
-5. End with a "**Overall Summary**" section that:
-   - Acknowledges the developer's effort
-   - Summarizes the key improvements
-   - Encourages continued learning and growth
-   - Maintains a positive, motivational tone
+    def _parse_summary_response(self, content: str) -> str:
+        """Parse a summary JSON response."""
+        try:
+            return str(orjson.loads(content)["summary"]).strip()
+        except (ValueError, KeyError, TypeError):
+            raise ValueError("Azure OpenAI response was not in the expected JSON format")
 
-Please ensure the response is well-formatted markdown and maintains a consistently empathetic tone throughout.
-"""
-        return prompt
+    def _parse_stream_sections(self, content: str, review_comments: List[str], indices: List[int]) -> Dict[int, str]:
+        """Split a streamed markdown review into section bodies keyed by comment index."""
+        index_by_comment = {review_comments[i - 1]: i for i in indices}
+        headings = list(self._STREAM_HEADING_PATTERN.finditer(content))
+        sections: Dict[int, str] = {}
+        for heading, next_heading in zip(headings, headings[1:] + [None]):
+            body = content[heading.end():next_heading.start() if next_heading else len(content)]
+            body = self._STREAM_SECTION_END_PATTERN.split(body, maxsplit=1)[0].strip()
+            i = index_by_comment.get(heading.group(1))
+            if i is not None and body:
+                sections[i] = body
+        return sections
+
+    def _render_section(self, section: Dict[str, Any], language: str) -> str:
+        """Render the structured fields of one review section as markdown."""
+        lines = [
+            f"* **Positive Rephrasing:** {str(section.get('positive', '')).strip()}",
+            "",
+            f"* **The 'Why':** {str(section.get('why', '')).strip()}",
+            "",
+            "* **Suggested Improvement:**",
+            f"```{language.lower()}",
+            str(section.get("code", "")).strip("\n"),
+            "```",
+        ]
+        resources = str(section.get("resources", "")).strip()
+        if resources:
+            lines.extend(["", f"* **Learn More:** {resources}"])
+        return "\n".join(lines)
+
+    def _render_report(self, review_comments: List[str], sections: Dict[int, str], summary: str) -> str:
+        """Render per-comment sections (keyed by 1-based index) and the summary as markdown."""
+        lines: List[str] = ["---"]
+        for i, comment in enumerate(review_comments, start=1):
+            lines.append(f"### Analysis of Comment: \"{comment}\"")
+            lines.append("")
+            lines.append(sections[i])
+            lines.append("")
+            lines.append("---")
+        if summary:
+            lines.append("")
+            lines.append("**Overall Summary**")
+            lines.append("")
+            lines.append(summary)
+        return "\n".join(lines)
 
     def _create_mock_report(
         self,
@@ -188,80 +677,407 @@ Please ensure the response is well-formatted markdown and maintains a consistent
         severity_levels: List[str],
     ) -> str:
         """Create a deterministic mock review report suitable for local testing."""
-        lines: List[str] = []
-        lines.append("---")
+        first_line = code_snippet.splitlines()[0] if code_snippet else "# (no code provided)"
+        fence = f"```{language.lower()}\n"
+
+        buf = io.StringIO()
+        w = buf.write
+        w("---\n")
         for i, (comment, severity) in enumerate(zip(review_comments, severity_levels), start=1):
-            lines.append(f"### Analysis of Comment {i}: \"{comment}\"")
-            lines.append("")
-            lines.append("* **Positive Rephrasing:** Nice progress here! Let's refine this area for clarity and performance.")
-            lines.append("")
             if severity == "harsh":
                 why = "The suggestion aims to improve reliability and readability while keeping your original intent."
             elif severity == "critical":
                 why = "This change balances readability and efficiency based on common best practices."
             else:
                 why = "A small tweak can improve maintainability without changing behavior."
-            lines.append(f"* **The 'Why':** {why}")
-            lines.append("")
-            lines.append("* **Suggested Improvement:**")
-            lines.append(f"```{language.lower()}")
-            lines.append("# Example improvement (mock)\n# Replace with a specific change based on context")
-            lines.append(code_snippet.splitlines()[0] if code_snippet else "# (no code provided)")
-            lines.append("```")
-            lines.append("")
-            lines.append("* **Learn More:** Consider consulting your team's style guide or official docs.")
-            lines.append("\n---\n")
+            w(f"### Analysis of Comment {i}: \"{comment}\"\n\n")
+            w("* **Positive Rephrasing:** Nice progress here! Let's refine this area for clarity and performance.\n\n")
+            w(f"* **The 'Why':** {why}\n\n")
+            w("* **Suggested Improvement:**\n")
+            w(fence)
+            w("# Example improvement (mock)\n")
+            w("# Replace with a specific change based on context\n")
+            w(first_line)
+            w("\n```\n\n")
+            w("* **Learn More:** Consider consulting your team's style guide or official docs.\n\n")
+            w("---\n\n")
 
-        lines.append("**Overall Summary**\n")
-        lines.append(
+        w("**Overall Summary**\n\n")
+        w(
             "Great work pushing this forward! With a few focused adjustments, "
             "your code will be clearer and easier to maintain. Keep iterating—you're on the right track!"
         )
-        return "\n".join(lines)
+        return buf.getvalue()
 
-    def _call_azure_openai(self, prompt: str) -> str:
-        """
-        Make a direct HTTP request to Azure OpenAI API.
-        
-        Args:
-            prompt: The user prompt to send to the API
-            
-        Returns:
-            The AI response content
-        """
-        # Construct the API URL
-        url = f"{self.endpoint}openai/deployments/{self.deployment_name}/chat/completions?api-version={self.api_version}"
-        
-        headers = {
+    def _create_session(self) -> "requests.Session":
+        """Create a pooled HTTP session that retries rate-limited and server errors."""
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+
+        retry = Retry(
+            total=self.max_retries,
+            backoff_factor=0.5,
+            status_forcelist=sorted(RETRYABLE_STATUS_CODES),
+            allowed_methods=frozenset({"POST"}),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=10, pool_maxsize=20, max_retries=retry)
+        session = requests.Session()
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def _get_api_url(self) -> str:
+        """Construct the chat completions URL for the configured deployment."""
+        return f"{self.endpoint}openai/deployments/{self.deployment_name}/chat/completions?api-version={self.api_version}"
+
+    def _get_headers(self) -> Dict[str, str]:
+        """Get the HTTP headers for Azure OpenAI requests."""
+        return {
             "Content-Type": "application/json",
             "api-key": self.api_key
         }
-        
+
+    def _build_request_data(self, prompts: List[str], max_tokens: int, json_mode: bool = True) -> Dict[str, Any]:
+        """Build the chat completions request body for the given user messages."""
         data = {
             "messages": [
                 {
                     "role": "system", 
-                    "content": self._get_system_prompt()
-                },
+                    "content": self._SYSTEM_PROMPT
+                }
+            ] + [
                 {
                     "role": "user", 
                     "content": prompt
                 }
+                for prompt in prompts
             ],
             "temperature": 0.7,
-            "max_tokens": 3000,
+            "max_tokens": max_tokens,
             "top_p": 0.9
         }
+        if json_mode:
+            data["response_format"] = {"type": "json_object"}
+        return data
+
+    def _section_max_tokens(self, code_snippet: str) -> int:
+        """Get the completion budget of one section, which includes a rewrite of the snippet."""
+        return SECTION_MAX_TOKENS + len(code_snippet) // 4
+
+    def _estimate_tokens(self, data: Dict[str, Any]) -> int:
+        """Roughly estimate the tokens a request consumes (~4 characters per token)."""
+        prompt_chars = sum(len(message["content"]) for message in data["messages"])
+        return prompt_chars // 4 + data["max_tokens"]
+
+    def _cache_key(self, data: Dict[str, Any]) -> str:
+        """Hash the canonicalized request body and target deployment for the exact-match response cache."""
+        # The body doesn't name the model, so switching deployment, endpoint or API
+        # version must not replay answers cached for the previous one
+        keyed = {
+            "endpoint": self.endpoint,
+            "deployment": self.deployment_name,
+            "api_version": self.api_version,
+            "request": data,
+        }
+        return hashlib.sha256(orjson.dumps(keyed, option=orjson.OPT_SORT_KEYS)).hexdigest()
+
+    def _get_cached_response(self, key: str) -> Optional[str]:
+        """Look up a previously stored response for an identical request."""
+        if self._disk_cache is None:
+            return None
+        return self._disk_cache.get(key)
+
+    def _store_cached_response(self, key: str, content: str) -> None:
+        """Store a response for later identical requests."""
+        if self._disk_cache is not None:
+            self._disk_cache.set(key, content)
+
+    def _parse_cached_response(self, key: str, parse: Callable[[str], T]) -> Optional[T]:
+        """Parse the stored response for an identical request, or return None if there is no usable one."""
+        cached = self._get_cached_response(key)
+        if cached is None:
+            return None
+        try:
+            return parse(cached)
+        except ValueError:
+            # Stored by an older version or otherwise unusable; fetch a fresh response
+            self._disk_cache.delete(key)
+            return None
+
+    def _parse_completion(self, key: str, result: Dict[str, Any], parse: Callable[[str], T]) -> T:
+        """Parse a chat completion, caching its content only if it finished normally and parsed."""
+        choice = result["choices"][0]
+        if choice.get("finish_reason") == "length":
+            raise _TruncatedResponseError("Azure OpenAI response was cut off at the max_tokens limit")
+        content = choice["message"]["content"]
+        parsed = parse(content)
+        if choice.get("finish_reason") == "stop":
+            self._store_cached_response(key, content)
+        return parsed
+
+    def _call_azure_openai(self, prompts: List[str], max_tokens: int, parse: Callable[[str], T]) -> T:
+        """
+        Make a direct HTTP request to Azure OpenAI API.
         
-        # Make the HTTP request
-        response = requests.post(url, headers=headers, json=data, timeout=60)
+        Args:
+            prompts: The user messages to send to the API, in order
+            max_tokens: Completion token budget for the response
+            parse: Parses the response content, raising ValueError if it is unusable
+            
+        Returns:
+            The parsed AI response
+        """
+        data = self._build_request_data(prompts, max_tokens)
+        key = self._cache_key(data)
+        cached = self._parse_cached_response(key, parse)
+        if cached is not None:
+            return cached
+
+        try:
+            return self._post_completion(key, data, parse)
+        except _TruncatedResponseError:
+            # Retry once with twice the budget; the result is cached under the original request
+            return self._post_completion(key, dict(data, max_tokens=data["max_tokens"] * 2), parse)
+
+    def _post_completion(self, key: str, data: Dict[str, Any], parse: Callable[[str], T]) -> T:
+        """Send a chat completions request and parse its response."""
+        response = self._session.post(self._get_api_url(), headers=self._get_headers(), data=orjson.dumps(data), timeout=60)
         
         if response.status_code == 200:
-            result = response.json()
-            return result["choices"][0]["message"]["content"]
+            return self._parse_completion(key, orjson.loads(response.content), parse)
         else:
             raise RuntimeError(f"Azure OpenAI API error: {response.status_code} - {response.text}")
 
+    def close(self) -> None:
+        """Close the HTTP sessions and stop the background event loop."""
+        with self._loop_lock:
+            if self._loop_thread is not None:
+                self._loop_thread.close()
+                self._loop_thread = None
+        if self._session is not None:
+            self._session.close()
+
+    def _run_async(self, coro: Any) -> Any:
+        """Run a coroutine on the reviewer's background event loop and wait for its result."""
+        with self._loop_lock:
+            if self._loop_thread is None:
+                self._loop_thread = _EventLoopThread()
+                # Close the aiohttp session when the reviewer is collected or at exit
+                weakref.finalize(self, self._loop_thread.close)
+            loop_thread = self._loop_thread
+        return loop_thread.run(coro)
+
+    def _call_azure_openai_stream(
+        self, prompts: List[str], max_tokens: int, on_complete: Optional[Callable[[str], None]] = None
+    ) -> Iterator[str]:
+        """
+        Make a streaming HTTP request to Azure OpenAI API.
+        
+        Args:
+            prompts: The user messages to send to the API, in order
+            max_tokens: Completion token budget for the response
+            on_complete: Called with the full content once the response has completed
+            
+        Yields:
+            Markdown content deltas as they arrive over server-sent events
+        """
+        data = self._build_request_data(prompts, max_tokens, json_mode=False)
+        data["stream"] = True
+        key = self._cache_key(data)
+        cached = self._get_cached_response(key)
+        if cached is not None:
+            yield cached
+            if on_complete is not None:
+                on_complete(cached)
+            return
+
+        chunks: List[str] = []
+        finish_reason = None
+        with self._session.post(
+            self._get_api_url(), headers=self._get_headers(), data=orjson.dumps(data), timeout=60, stream=True
+        ) as response:
+            if response.status_code != 200:
+                raise RuntimeError(f"Azure OpenAI API error: {response.status_code} - {response.text}")
+
+            for line in response.iter_lines():
+                if not line.startswith(b"data: "):
+                    continue
+                payload = line[len(b"data: "):].strip()
+                if payload == b"[DONE]":
+                    break
+                for choice in orjson.loads(payload).get("choices", []):
+                    content = (choice.get("delta") or {}).get("content")
+                    if content:
+                        chunks.append(content)
+                        yield content
+                    finish_reason = choice.get("finish_reason") or finish_reason
+
+        # Only a stream that ran to completion is worth replaying; a cut-off one
+        # is already on screen, so say so instead of failing the whole review
+        if finish_reason == "length":
+            yield "\n\n_⚠️ The review was cut off at the response length limit._"
+        if finish_reason == "stop":
+            content = "".join(chunks)
+            self._store_cached_response(key, content)
+            if on_complete is not None:
+                on_complete(content)
+
+    def _generate_batched(self, code_snippet: str, review_comments: List[str], language: str,
+                          severity_levels: List[str], pending: List[int]) -> Tuple[Dict[int, str], str]:
+        """Generate sections for the pending comments plus the summary in a single request."""
+        context = self._create_context_prompt(code_snippet, language)
+        comment_prompts = self._create_comment_prompts(review_comments, severity_levels)
+
+        if not pending:
+            summary = self._call_azure_openai(
+                [context, *comment_prompts, self._create_summary_instructions()], SUMMARY_MAX_TOKENS,
+                self._parse_summary_response,
+            )
+            return {}, summary
+
+        section_max_tokens = self._section_max_tokens(code_snippet)
+        parse_batch = lambda content: self._parse_batch_response(content, language)
+        sections, summary = self._call_azure_openai(
+            [context, *comment_prompts, self._create_batch_instructions(language, pending)],
+            section_max_tokens * len(pending) + SUMMARY_MAX_TOKENS,
+            parse_batch,
+        )
+        sections = {i: section for i, section in sections.items() if i in pending}
+
+        # Ask once more for any comment the model skipped rather than dropping it from the report
+        missing = [i for i in pending if i not in sections]
+        if missing:
+            retried, _ = self._call_azure_openai(
+                [context, *comment_prompts, self._create_batch_instructions(language, missing)],
+                section_max_tokens * len(missing) + SUMMARY_MAX_TOKENS,
+                parse_batch,
+            )
+            sections.update((i, section) for i, section in retried.items() if i in missing)
+            missing = [i for i in pending if i not in sections]
+            if missing:
+                raise ValueError(
+                    f"Azure OpenAI response is missing sections for comments {', '.join(map(str, missing))}"
+                )
+
+        return sections, summary
+
+    async def _call_azure_openai_async(
+        self,
+        session: "aiohttp.ClientSession",
+        prompts: List[str],
+        max_tokens: int,
+        parse: Callable[[str], T],
+        limiter: _RateLimiter,
+        semaphore: "asyncio.Semaphore",
+    ) -> T:
+        """
+        Make a throttled, retrying HTTP request to Azure OpenAI API.
+        
+        Args:
+            session: Shared aiohttp session
+            prompts: The user messages to send to the API, in order
+            max_tokens: Completion token budget for the response
+            parse: Parses the response content, raising ValueError if it is unusable
+            limiter: Rate limiter shared by all requests of the reviewer
+            semaphore: Bounds the number of in-flight requests
+            
+        Returns:
+            The parsed AI response
+        """
+        data = self._build_request_data(prompts, max_tokens)
+        key = self._cache_key(data)
+        cached = self._parse_cached_response(key, parse)
+        if cached is not None:
+            return cached
+
+        try:
+            return await self._post_completion_async(session, key, data, parse, limiter, semaphore)
+        except _TruncatedResponseError:
+            # Retry once with twice the budget; the result is cached under the original request
+            data = dict(data, max_tokens=data["max_tokens"] * 2)
+            return await self._post_completion_async(session, key, data, parse, limiter, semaphore)
+
+    async def _post_completion_async(
+        self,
+        session: "aiohttp.ClientSession",
+        key: str,
+        data: Dict[str, Any],
+        parse: Callable[[str], T],
+        limiter: _RateLimiter,
+        semaphore: "asyncio.Semaphore",
+    ) -> T:
+        """Send a chat completions request, retrying rate-limited and server errors, and parse its response."""
+        import asyncio
+
+        import aiohttp
+
+        timeout = aiohttp.ClientTimeout(total=60)
+
+        for attempt in range(self.max_retries + 1):
+            await limiter.acquire(self._estimate_tokens(data))
+            try:
+                async with semaphore:
+                    async with session.post(
+                        self._get_api_url(), headers=self._get_headers(), data=orjson.dumps(data), timeout=timeout
+                    ) as response:
+                        if response.status == 200:
+                            result = await response.json(loads=orjson.loads)
+                            return self._parse_completion(key, result, parse)
+                        status, text = response.status, await response.text()
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if attempt == self.max_retries:
+                    raise RuntimeError(f"Azure OpenAI request failed: {e}")
+            else:
+                if status not in RETRYABLE_STATUS_CODES or attempt == self.max_retries:
+                    raise RuntimeError(f"Azure OpenAI API error: {status} - {text}")
+
+            # Exponential backoff before retrying
+            await asyncio.sleep(0.5 * 2 ** attempt)
+
+        raise RuntimeError("Azure OpenAI request failed after retries")
+
+    async def _generate_parallel(self, code_snippet: str, review_comments: List[str], language: str,
+                                 severity_levels: List[str], pending: List[int]) -> Tuple[Dict[int, str], str]:
+        """Generate one section per pending comment plus the summary with concurrent requests."""
+        import asyncio
+
+        context = self._create_context_prompt(code_snippet, language)
+        comment_prompts = self._create_comment_prompts(review_comments, severity_levels)
+        section_instructions = self._create_section_instructions(language)
+
+        section_max_tokens = self._section_max_tokens(code_snippet)
+        parse_section = lambda content: self._parse_section_response(content, language)
+        requests_to_send = [
+            ([context, comment_prompts[i - 1], section_instructions], section_max_tokens, parse_section)
+            for i in pending
+        ]
+        requests_to_send.append(
+            ([context, *comment_prompts, self._create_summary_instructions()], SUMMARY_MAX_TOKENS,
+             self._parse_summary_response)
+        )
+
+        if self._limiter is None:
+            self._limiter = _RateLimiter(self.max_requests_per_minute, self.max_tokens_per_minute)
+            self._semaphore = asyncio.Semaphore(self.max_concurrent_requests)
+        session = self._loop_thread.get_session()
+        tasks = [
+            asyncio.ensure_future(
+                self._call_azure_openai_async(session, prompts, max_tokens, parse, self._limiter, self._semaphore)
+            )
+            for prompts, max_tokens, parse in requests_to_send
+        ]
+        try:
+            results = await asyncio.gather(*tasks)
+        except BaseException:
+            # The loop outlives this review, so don't leave the other requests running
+            for task in tasks:
+                task.cancel()
+            raise
+
+        return dict(zip(pending, results[:-1])), results[-1]
+
 
 def main():
     """Main function for testing the reviewer."""
@@ -0,0 +1,92 @@
+"""
+Empathetic Code Reviewer - Keyword Matcher
+
+This module classifies text by whole-word keyword matches using a trie
+automaton scanned over the raw bytes. When the optional `numba` package is
+installed the scan is JIT-compiled, which pays off when classifying many
+comments in bulk.
+"""
+
+import importlib.util
+from typing import Callable, Optional, Sequence
+
+import numpy as np
+
+# numba itself is only imported when the first classifier is built
+NUMBA_AVAILABLE = importlib.util.find_spec("numba") is not None
+
+_compiled_classify: Optional[Callable[..., int]] = None
+
+
+def _classify(text: np.ndarray, goto: np.ndarray, output: np.ndarray, max_level: int) -> int:
+    """Return the highest level of any whole word of `text` found in the automaton."""
+    best = 0
+    state = 0
+    for i in range(text.shape[0]):
+        byte = text[i]
+        if 65 <= byte <= 90:
+            byte += 32
+        if 97 <= byte <= 122:
+            # Inside a word: follow the trie, or stay dead (-1) until the word ends
+            if state >= 0:
+                state = goto[state, byte]
+        else:
+            if state > 0 and output[state] > best:
+                best = output[state]
+                if best == max_level:
+                    return best
+            state = 0
+    if state > 0 and output[state] > best:
+        best = output[state]
+    return best
+
+
+def _get_kernel() -> Callable[..., int]:
+    """Return the JIT-compiled scan, or the plain Python one without numba."""
+    global _compiled_classify
+    if _compiled_classify is None:
+        if NUMBA_AVAILABLE:
+            from numba import njit
+            _compiled_classify = njit(cache=True)(_classify)
+        else:
+            _compiled_classify = _classify
+    return _compiled_classify
+
+
+class KeywordClassifier:
+    """
+    Matches the words of a text against ordered keyword sets.
+
+    `classify` returns 0 when no keyword matches, otherwise the 1-based
+    position of the highest keyword set with a match, so later sets take
+    priority over earlier ones.
+    """
+
+    def __init__(self, keyword_sets: Sequence[Sequence[str]]):
+        """Build the trie automaton for lowercase ASCII keywords.
+
+        Args:
+            keyword_sets: Keyword collections ordered from lowest to highest priority
+        """
+        transitions = [np.full(256, -1, dtype=np.int32)]
+        levels = [0]
+        for level, keywords in enumerate(keyword_sets, start=1):
+            for keyword in keywords:
+                state = 0
+                for byte in keyword.lower().encode("ascii"):
+                    if transitions[state][byte] == -1:
+                        transitions[state][byte] = len(transitions)
+                        transitions.append(np.full(256, -1, dtype=np.int32))
+                        levels.append(0)
+                    state = transitions[state][byte]
+                levels[state] = max(levels[state], level)
+
+        self._goto = np.stack(transitions)
+        self._output = np.array(levels, dtype=np.int32)
+        self._max_level = len(keyword_sets)
+        self._kernel = _get_kernel()
+
+    def classify(self, text: str) -> int:
+        """Classify `text`, returning the matched priority level (0 for none)."""
+        data = np.frombuffer(text.encode("utf-8"), dtype=np.uint8)
+        return int(self._kernel(data, self._goto, self._output, self._max_level))
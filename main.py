@@ -8,20 +8,24 @@ then generates empathetic, constructive feedback using Azure OpenAI.
 
 Usage:
     python main.py <input_json_file>
+    python main.py <input_json_file_or_glob> [...] [-o output_dir]
     python main.py --interactive
     python main.py --help
 
 Examples:
     python main.py examples/sample_input.json
+    python main.py "examples/*.json" -o reports/
     python main.py --interactive
 """
 
 import argparse
+import glob
 import json
 import sys
 import os
-from typing import Dict, Any
-from dotenv import load_dotenv
+import orjson
+from collections import Counter
+from typing import Dict, Any, List, Optional
 
 from code_reviewer import EmpatheticCodeReviewer
 
@@ -45,9 +49,9 @@ def load_json_input(file_path: str) -> Dict[str, Any]:
         raise FileNotFoundError(f"Input file not found: {file_path}")
     
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-    except json.JSONDecodeError as e:
+        with open(file_path, 'rb') as f:
+            data = orjson.loads(f.read())
+    except orjson.JSONDecodeError as e:
         raise json.JSONDecodeError(f"Invalid JSON in file {file_path}: {e}", e.doc, e.pos)
     
     # Validate required keys
@@ -71,21 +75,20 @@ def interactive_mode(use_mock: bool = False):
     print("🤖 Empathetic Code Reviewer - Interactive Mode")
     print("=" * 50)
     
-    # Get code snippet
-    print("\nPlease enter your code snippet (press Enter twice when done):")
+    # Get code snippet (read up to a ``` line, so blank lines inside the code are kept)
+    print("\nPlease paste your code snippet, then enter a line with ``` when done:")
     code_lines = []
-    empty_line_count = 0
     
-    while empty_line_count < 2:
-        line = input()
-        if line.strip() == "":
-            empty_line_count += 1
-        else:
-            empty_line_count = 0
+    while True:
+        try:
+            line = input()
+        except EOFError:
+            break
+        if line.strip() == "```":
+            break
         code_lines.append(line)
     
-    # Remove the last two empty lines
-    code_snippet = '\n'.join(code_lines[:-2])
+    code_snippet = "\n".join(code_lines).rstrip()
     
     if not code_snippet.strip():
         print("❌ Error: Code snippet cannot be empty")
@@ -96,7 +99,10 @@ def interactive_mode(use_mock: bool = False):
     review_comments = []
     
     while True:
-        comment = input(f"Comment {len(review_comments) + 1}: ").strip()
+        try:
+            comment = input(f"Comment {len(review_comments) + 1}: ").strip()
+        except EOFError:
+            break
         if not comment:
             break
         review_comments.append(comment)
@@ -123,9 +129,15 @@ def interactive_mode(use_mock: bool = False):
         print(result)
         
         # Ask if user wants to save the result
-        save_choice = input("\n💾 Would you like to save this report to a file? (y/n): ").lower()
+        try:
+            save_choice = input("\n💾 Would you like to save this report to a file? (y/n): ").lower()
+        except EOFError:
+            save_choice = ""
         if save_choice in ['y', 'yes']:
-            filename = input("Enter filename (default: review_report.md): ").strip()
+            try:
+                filename = input("Enter filename (default: review_report.md): ").strip()
+            except EOFError:
+                filename = ""
             if not filename:
                 filename = "review_report.md"
             
@@ -165,6 +177,114 @@ def process_file_mode(input_file: str, output_file: str = None, use_mock: bool =
         sys.exit(1)
 
 
+# Reviewer owned by each batch worker process, created once by _init_worker
+_worker_reviewer: Optional[EmpatheticCodeReviewer] = None
+
+
+def _init_worker(use_mock: bool, jit_severity: bool):
+    """Load the environment and create this worker's reviewer (and its HTTP session/caches)."""
+    global _worker_reviewer
+    from dotenv import load_dotenv
+    load_dotenv()
+    # Every worker holds its own copy of the embedding model if the semantic cache is
+    # enabled; it is loaded on the worker's first review instead of warmed up for the examples
+    _worker_reviewer = EmpatheticCodeReviewer(
+        use_mock=use_mock, jit_severity=jit_severity, warmup_semantic_cache=False
+    )
+
+
+def _process_one(input_file: str, output_file: str) -> str:
+    """Review one input file in a worker process and write the report to output_file."""
+    input_data = load_json_input(input_file)
+    result = _worker_reviewer.generate_empathetic_review(input_data)
+    with open(output_file, 'w', encoding='utf-8') as f:
+        f.write(result)
+    return output_file
+
+
+def expand_input_files(patterns: List[str]) -> List[str]:
+    """Expand glob patterns into a sorted, de-duplicated list of input files."""
+    files = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern]
+        for path in matches:
+            if path not in files:
+                files.append(path)
+    return files
+
+
+def is_batch_invocation(patterns: List[str], output: Optional[str]) -> bool:
+    """Decide from the command line (not the match count) whether -o names a directory of reports.
+
+    Only a single literal input file without a directory-like -o gets file-style output.
+    """
+    if len(patterns) > 1 or any(glob.has_magic(pattern) for pattern in patterns):
+        return True
+    if output:
+        separators = tuple(sep for sep in (os.sep, os.altsep) if sep)
+        return output.endswith(separators) or os.path.isdir(output)
+    return False
+
+
+def process_batch_mode(input_files: List[str], output_dir: str = None, use_mock: bool = False,
+                       jit_severity: bool = False):
+    """Process several JSON input files in parallel, writing one Markdown report per input."""
+    if output_dir:
+        # Mirror the inputs' layout below their common directory, so inputs with
+        # the same file name in different directories get separate reports
+        common_dir = os.path.commonpath([os.path.dirname(os.path.abspath(f)) for f in input_files])
+
+    jobs = {}
+    for input_file in input_files:
+        report_name = os.path.splitext(os.path.basename(input_file))[0] + ".md"
+        if output_dir:
+            relative_dir = os.path.relpath(os.path.dirname(os.path.abspath(input_file)), common_dir)
+            report_dir = os.path.normpath(os.path.join(output_dir, relative_dir))
+        else:
+            report_dir = os.path.dirname(input_file)
+        jobs[input_file] = os.path.join(report_dir, report_name)
+
+    # Refuse to let two inputs overwrite each other's report
+    report_counts = Counter(os.path.abspath(path) for path in jobs.values())
+    duplicates = [path for path in jobs.values() if report_counts[os.path.abspath(path)] > 1]
+    if duplicates:
+        print("❌ Error: Several inputs would be written to the same report:")
+        for path in sorted(set(duplicates)):
+            print(f"   - {path}")
+        sys.exit(1)
+
+    for output_file in jobs.values():
+        os.makedirs(os.path.dirname(output_file) or ".", exist_ok=True)
+
+    # Imported here so single-file runs and --help don't load multiprocessing
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    print(f"📂 Processing {len(input_files)} input files...")
+    failures = 0
+    # Reviews are dominated by waiting on Azure, so workers scale well beyond CPU count
+    with ProcessPoolExecutor(
+        max_workers=min(16, len(input_files)),
+        initializer=_init_worker,
+        initargs=(use_mock, jit_severity),
+    ) as executor:
+        futures = {
+            executor.submit(_process_one, input_file, output_file): input_file
+            for input_file, output_file in jobs.items()
+        }
+        for future in as_completed(futures):
+            input_file = futures[future]
+            try:
+                output_file = future.result()
+                print(f"✅ {input_file} -> {output_file}")
+            except Exception as e:
+                failures += 1
+                print(f"❌ {input_file}: {e}")
+
+    if failures:
+        print(f"❌ {failures} of {len(input_files)} files failed")
+        sys.exit(1)
+
+
 def main():
     """Main application entry point."""
     parser = argparse.ArgumentParser(
@@ -174,19 +294,23 @@ def main():
 Examples:
   python main.py examples/sample_input.json
   python main.py input.json -o report.md
+  python main.py "inputs/*.json" -o reports/
   python main.py --interactive
         """
     )
     
     parser.add_argument(
-        'input_file',
-        nargs='?',
-        help='JSON file containing code_snippet and review_comments'
+        'input_files',
+        nargs='*',
+        help='JSON file(s) or glob patterns containing code_snippet and review_comments'
     )
     
     parser.add_argument(
         '-o', '--output',
-        help='Output file for the generated report (default: print to stdout)'
+        help='Output file for the generated report (default: print to stdout); '
+             'with several inputs, a glob, or a path ending in / or naming an existing directory, '
+             'the directory for the per-file reports, mirroring the inputs\' subdirectories '
+             '(default: next to each input)'
     )
     
     parser.add_argument(
@@ -201,6 +325,13 @@ Examples:
         help='Use mock mode (no Azure calls) for quick local testing'
     )
     
+    parser.add_argument(
+        '--jit-severity',
+        action='store_true',
+        help='In batch mode, assess comment severity with the numba-compiled scanner '
+             '(only faster for very large batches; requires numba)'
+    )
+    
     parser.add_argument(
         '--version',
         action='version',
@@ -209,7 +340,8 @@ Examples:
     
     args = parser.parse_args()
     
-    # Load environment variables from .env file
+    # Load environment variables from .env file (imported here so --help stays fast)
+    from dotenv import load_dotenv
     load_dotenv()
     
     # Check for environment variables unless in mock mode
@@ -232,8 +364,15 @@ Examples:
     # Handle different modes
     if args.interactive:
         interactive_mode(use_mock=args.mock)
-    elif args.input_file:
-        process_file_mode(args.input_file, args.output, use_mock=args.mock)
+    elif args.input_files:
+        input_files = expand_input_files(args.input_files)
+        if not input_files:
+            print("❌ Error: No input files matched")
+            sys.exit(1)
+        if is_batch_invocation(args.input_files, args.output):
+            process_batch_mode(input_files, args.output, use_mock=args.mock, jit_severity=args.jit_severity)
+        else:
+            process_file_mode(input_files[0], args.output, use_mock=args.mock)
     else:
         parser.print_help()
         sys.exit(1)
@@ -0,0 +1,140 @@
+"""
+Empathetic Code Reviewer - Semantic Cache
+
+This module caches generated review sections keyed on an exact key (the
+hash of the code snippet) plus a sentence embedding of the comment, so
+near-duplicate comments on the same code reuse an earlier response instead
+of paying for another Azure OpenAI round-trip.
+
+Requires the optional `sentence-transformers` and `faiss-cpu` packages.
+"""
+
+import importlib.util
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+class SemanticCache:
+    """
+    An LRU cache of review sections looked up by cosine similarity of
+    L2-normalized MiniLM embeddings in a FAISS inner-product index. Each
+    entry also has an exact key, and lookups only consider entries stored
+    under the same key.
+
+    The embedding model is loaded on first use (or by `warmup`), and all
+    model and index access is serialized so a background warmup thread can
+    run alongside requests.
+    """
+
+    def __init__(
+        self,
+        model_name: str = "all-MiniLM-L6-v2",
+        similarity_threshold: float = 0.87,
+        max_entries: int = 1000,
+    ):
+        """Configure the cache; the model and index are created lazily.
+
+        Args:
+            model_name: Sentence-transformers model used to embed cache keys
+            similarity_threshold: Minimum cosine similarity for a cache hit
+            max_entries: Number of entries kept before evicting the least recently used
+        """
+        missing = [name for name in ("faiss", "sentence_transformers") if importlib.util.find_spec(name) is None]
+        if missing:
+            raise ImportError(
+                "Semantic caching requires the 'sentence-transformers' and 'faiss-cpu' packages: "
+                "pip install sentence-transformers faiss-cpu"
+            )
+
+        self.model_name = model_name
+        self.similarity_threshold = similarity_threshold
+        self.max_entries = max_entries
+
+        self._lock = threading.RLock()
+        self._model = None
+        self._index = None
+        self._entries: "OrderedDict[int, Tuple[str, str]]" = OrderedDict()
+        self._ids_by_key: Dict[str, List[int]] = {}
+        self._next_id = 0
+
+        # Embeddings computed ahead of time by `warmup`, keyed by their text
+        self._precomputed: Dict[str, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _ensure_model(self) -> None:
+        """Load the embedding model and create the index if not done yet."""
+        with self._lock:
+            if self._model is not None:
+                return
+
+            import faiss
+            from sentence_transformers import SentenceTransformer
+
+            self._model = SentenceTransformer(self.model_name)
+            dimension = self._model.get_sentence_embedding_dimension()
+            self._index = faiss.IndexIDMap(faiss.IndexFlatIP(dimension))
+
+    def _embed(self, texts: List[str]) -> np.ndarray:
+        embeddings = self._model.encode(texts, normalize_embeddings=True)
+        return np.asarray(embeddings, dtype=np.float32).reshape(len(texts), -1)
+
+    def warmup(self, texts: List[str]) -> None:
+        """Load the model and precompute embeddings for texts likely to be looked up."""
+        with self._lock:
+            self._ensure_model()
+            pending = [text for text in dict.fromkeys(texts) if text not in self._precomputed]
+            if pending:
+                for text, embedding in zip(pending, self._embed(pending)):
+                    self._precomputed[text] = embedding
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """Embed texts as L2-normalized float32 vectors, one row per text."""
+        with self._lock:
+            self._ensure_model()
+            missing = [text for text in texts if text not in self._precomputed]
+            computed = dict(zip(missing, self._embed(missing))) if missing else {}
+            return np.stack([
+                self._precomputed[text] if text in self._precomputed else computed[text]
+                for text in texts
+            ])
+
+    def get(self, key: str, embedding: np.ndarray) -> Optional[str]:
+        """Return the value under `key` most similar to `embedding`, or None below the threshold."""
+        with self._lock:
+            candidate_ids = self._ids_by_key.get(key)
+            if not candidate_ids:
+                return None
+
+            import faiss
+
+            selector = faiss.IDSelectorBatch(np.array(candidate_ids, dtype=np.int64))
+            scores, ids = self._index.search(
+                embedding.reshape(1, -1), 1, params=faiss.SearchParameters(sel=selector)
+            )
+            entry_id = int(ids[0][0])
+            if entry_id == -1 or scores[0][0] < self.similarity_threshold:
+                return None
+
+            self._entries.move_to_end(entry_id)
+            return self._entries[entry_id][1]
+
+    def add(self, key: str, embedding: np.ndarray, value: str) -> None:
+        """Store `value` under `key` and `embedding`, evicting the least recently used entry if full."""
+        with self._lock:
+            self._ensure_model()
+            if len(self._entries) >= self.max_entries:
+                oldest_id, (oldest_key, _) = self._entries.popitem(last=False)
+                self._index.remove_ids(np.array([oldest_id], dtype=np.int64))
+                self._ids_by_key[oldest_key].remove(oldest_id)
+                if not self._ids_by_key[oldest_key]:
+                    del self._ids_by_key[oldest_key]
+
+            self._index.add_with_ids(embedding.reshape(1, -1), np.array([self._next_id], dtype=np.int64))
+            self._entries[self._next_id] = (key, value)
+            self._ids_by_key.setdefault(key, []).append(self._next_id)
+            self._next_id += 1
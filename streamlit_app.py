@@ -11,32 +11,58 @@ Usage:
 """
 
 import streamlit as st
-import json
+import mmap
+import orjson
 import os
+import pandas as pd
 from typing import Dict, Any, List
 from dotenv import load_dotenv
 
 from code_reviewer import EmpatheticCodeReviewer
 
 
-def load_example_files() -> Dict[str, Dict[str, Any]]:
-    """Load all example JSON files for the dropdown."""
+EXAMPLE_DIR = "examples"
+
+
+@st.cache_data(ttl=300, show_spinner=False)
+def load_example_files(dir_mtime: float) -> Dict[str, Dict[str, Any]]:
+    """Load all example JSON files for the dropdown.
+
+    Args:
+        dir_mtime: Modification time of the examples directory; only used as
+            part of the cache key so adding or removing files invalidates it
+    """
     examples = {}
-    example_dir = "examples"
+    example_dir = EXAMPLE_DIR
     
     if os.path.exists(example_dir):
-        for filename in os.listdir(example_dir):
-            if filename.endswith('.json'):
-                try:
-                    with open(os.path.join(example_dir, filename), 'r', encoding='utf-8') as f:
-                        data = json.load(f)
-                        examples[filename] = data
-                except Exception as e:
-                    st.error(f"Error loading {filename}: {e}")
+        with os.scandir(example_dir) as it:
+            json_entries = [entry for entry in it if entry.name.endswith('.json') and entry.is_file()]
+        
+        for entry in json_entries:
+            try:
+                # Parse straight from the memory-mapped file, skipping a buffered read copy
+                with open(entry.path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    with memoryview(mm) as view:
+                        examples[entry.name] = orjson.loads(view)
+            except Exception as e:
+                st.error(f"Error loading {entry.name}: {e}")
     
     return examples
 
 
+def get_reviewer(use_mock: bool) -> EmpatheticCodeReviewer:
+    """Get the reviewer for this session, creating it on first use.
+
+    Keeping it in session state lets the HTTP connection pool and caches
+    persist across reruns instead of being rebuilt on every click.
+    """
+    key = f"reviewer_{use_mock}"
+    if key not in st.session_state:
+        st.session_state[key] = EmpatheticCodeReviewer(use_mock=use_mock)
+    return st.session_state[key]
+
+
 def main():
     """Main Streamlit application."""
     # Page configuration
@@ -81,8 +107,9 @@ def main():
             st.sidebar.error(f"Missing environment variables: {', '.join(missing_vars)}")
             st.sidebar.info("💡 Enable Mock Mode or configure your .env file")
     
-    # Load example files
-    examples = load_example_files()
+    # Load example files (cached across reruns until the directory changes)
+    examples_mtime = os.path.getmtime(EXAMPLE_DIR) if os.path.exists(EXAMPLE_DIR) else 0.0
+    examples = load_example_files(examples_mtime)
     
     # Main interface
     col1, col2 = st.columns([1, 1])
@@ -110,63 +137,52 @@ def main():
                 code_snippet = ""
                 review_comments = []
         else:
+            selected_example = ""
             code_snippet = ""
             review_comments = []
         
-        st.subheader("💻 Code Snippet")
-        code_input = st.text_area(
-            "Enter your code snippet:",
-            value=code_snippet,
-            height=200,
-            help="Paste the code that was reviewed"
-        )
-        
-        st.subheader("💬 Review Comments")
-        st.write("Add the original review comments (one per line):")
-        
-        # Dynamic comment input
-        if 'comments' not in st.session_state:
-            st.session_state.comments = review_comments if review_comments else [""]
-        
-        # Display comment inputs
-        for i, comment in enumerate(st.session_state.comments):
-            col_comment, col_remove = st.columns([4, 1])
-            with col_comment:
-                st.session_state.comments[i] = st.text_input(
-                    f"Comment {i+1}:",
-                    value=comment,
-                    key=f"comment_{i}"
-                )
-            with col_remove:
-                if len(st.session_state.comments) > 1:
-                    if st.button("🗑️", key=f"remove_{i}", help="Remove this comment"):
-                        st.session_state.comments.pop(i)
-                        st.rerun()
-        
-        # Add/Remove comment buttons
-        col_add, col_clear = st.columns(2)
-        with col_add:
-            if st.button("➕ Add Comment"):
-                st.session_state.comments.append("")
-                st.rerun()
-        
-        with col_clear:
-            if st.button("🗑️ Clear All"):
-                st.session_state.comments = [""]
-                st.rerun()
+        # Inputs live in a form so typing doesn't rerun the script until submit
+        with st.form("review_input"):
+            st.subheader("💻 Code Snippet")
+            code_input = st.text_area(
+                "Enter your code snippet:",
+                value=code_snippet,
+                height=200,
+                help="Paste the code that was reviewed"
+            )
+            
+            st.subheader("💬 Review Comments")
+            st.write("Add the original review comments (one per row, use ➕ to add rows):")
+            
+            # Dynamic comment table, reset whenever a different example is loaded
+            comments_df = st.data_editor(
+                pd.DataFrame({"comment": review_comments if review_comments else [""]}),
+                num_rows="dynamic",
+                use_container_width=True,
+                hide_index=True,
+                column_config={"comment": st.column_config.TextColumn("Comment", width="large")},
+                key=f"comments_{selected_example}"
+            )
+            
+            submitted = st.form_submit_button(
+                "🚀 Generate Empathetic Review", type="primary", use_container_width=True
+            )
     
     with col2:
         st.header("📊 Empathetic Review")
         
-        # Generate review button
-        if st.button("🚀 Generate Empathetic Review", type="primary", use_container_width=True):
+        # Generate review on form submission
+        if submitted:
             # Validation
             if not code_input.strip():
                 st.error("❌ Please enter a code snippet")
                 return
             
             # Filter out empty comments
-            filtered_comments = [c.strip() for c in st.session_state.comments if c.strip()]
+            filtered_comments = [
+                str(c).strip() for c in comments_df["comment"].tolist()
+                if c is not None and not pd.isna(c) and str(c).strip()
+            ]
             
             if not filtered_comments:
                 st.error("❌ Please enter at least one review comment")
@@ -179,14 +195,12 @@ def main():
             }
             
             try:
-                with st.spinner("🔄 Generating empathetic review..."):
-                    reviewer = EmpatheticCodeReviewer(use_mock=use_mock)
-                    result = reviewer.generate_empathetic_review(input_data)
+                reviewer = get_reviewer(use_mock)
                 
-                # Display result
-                st.success("✅ Review generated successfully!")
+                # Stream the result as it is generated
                 st.markdown("### 📝 Generated Review")
-                st.markdown(result)
+                result = st.write_stream(reviewer.generate_empathetic_review_stream(input_data))
+                st.success("✅ Review generated successfully!")
                 
                 # Download button
                 st.download_button(